@@ -2,18 +2,18 @@
 Nocopy CLI application.
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import itertools
+import json
 from pathlib import Path
 import sys
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import click
-import jinja2
 from nocopy import Client
 from nocopy.client import build_url
 from pydantic import BaseModel
-from thefuzz import process as fuzz_process
 
-from cli.file import file
 from cli import cli_options
 
 
@@ -55,7 +55,8 @@ def __check_get_config(
             "if defined by parameter _both_ --url and --token have to be set"
         )
     if got_url and got_token:
-        return Config(url, token)
+        # Both values are plain strings from click, no validation needed.
+        return Config.construct(base_url=url, auth_token=token)
     if not got_config:
         raise click.BadOptionUsage(
             "connection information missing, use a config file or the "
@@ -69,11 +70,31 @@ def __load_input(
     format_option: Optional[str],
     **kwargs,
 ) -> Dict[str, Any]:
+    from cli.file import file
+
     f = file(format_option=format_option, input_path=input_file, **kwargs)
     # TODO: Handle exceptions
     return f.load()
 
 
+def __load_input_batches(
+    input_file: Optional[Path],
+    format_option: Optional[str],
+    batch_size: int,
+    **kwargs,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields the records of the input in lists of at most `batch_size` records.
+    Formats which can be read incrementally (CSV) are never loaded as a whole.
+    """
+    from cli.file import file
+
+    f = file(format_option=format_option, input_path=input_file, **kwargs)
+    records = f.load_iter()
+    while batch := list(itertools.islice(records, batch_size)):
+        yield batch
+
+
 def __get_client(
     config_file: Path,
     url: str,
@@ -93,6 +114,8 @@ def __write_output(
     data: List[Dict[str, Any]],
     **kwargs,
 ):
+    from cli.file import file
+
     f = file(
         format_option=format_option,
         output_path=output_file,
@@ -101,6 +124,75 @@ def __write_output(
     f.save(data)
 
 
+def __fuzzy_filter(
+    data: List[Dict[str, Any]],
+    query: str,
+    top_k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Returns the records matching the fuzzy query ordered by their score. Each
+    record is normalized only once instead of once per comparison. If `top_k`
+    is set only the best `top_k` matches are kept.
+
+    Records containing the query as a substring are returned right away
+    without computing any edit distance.
+    """
+    # Imported here as only pull with a query needs it.
+    from rapidfuzz import fuzz, process as fuzz_process, utils as fuzz_utils
+
+    query = fuzz_utils.default_process(query)
+    choices = [
+        fuzz_utils.default_process(
+            json.dumps(record, sort_keys=True, ensure_ascii=False)
+        )
+        for record in data
+    ]
+    if query:
+        exact = [
+            record for record, choice in zip(data, choices) if query in choice
+        ]
+        if exact:
+            return exact[:top_k]
+    matches = fuzz_process.extract(
+        query,
+        choices,
+        scorer=fuzz.WRatio,
+        processor=None,
+        score_cutoff=50,
+        limit=top_k,
+    )
+    return [data[index] for _, _, index in matches]
+
+
+def __for_each_concurrently(
+    records: List[Dict[str, Any]],
+    func: Callable[[Dict[str, Any]], Any],
+    label: str,
+    max_workers: int = 32,
+):
+    """
+    Calls `func` for each record using a pool of threads as the requests to
+    NocoDB spend most of their time waiting on the network. Shows a progress
+    bar and re-raises the first error, pending calls are cancelled in this
+    case.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(func, record) for record in records]
+        try:
+            with click.progressbar(
+                as_completed(futures),
+                length=len(futures),
+                label=label,
+                show_pos=True,
+            ) as bar:
+                for future in bar:
+                    future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
 @click.group()
 def cli():
     """CLI tools for NocoDB."""
@@ -258,6 +350,8 @@ def jinja(
     token: str,
 ):
     """Apply the data to a Jinja2 template file."""
+    import jinja2
+
     client = __get_client(config_file, url, table, token)
     data = client.list(
         where=where,
@@ -278,20 +372,21 @@ def jinja(
 @cli_options.config
 @cli_options.format
 @cli_options.input
+@cli_options.batch_size
 @cli_options.table
 def push(
     config_file: Path,
     file_format: Optional[str],
     input_file: Path,
+    batch_size: int,
     url: str,
     table: str,
     token: str,
 ):
     """Upload the content of a JSON/CSV file to NocoDB."""
     client = __get_client(config_file, url, table, token)
-    data = __load_input(input_file, file_format)
-
-    client.add(data)
+    for batch in __load_input_batches(input_file, file_format, batch_size):
+        client.add(batch)
 
 
 @click.command()
@@ -309,6 +404,7 @@ def init(output_file: Path):
 @cli_options.config
 @cli_options.format
 @cli_options.fuzzy_query
+@cli_options.top_k
 @cli_options.output
 @cli_options.where
 @cli_options.limit
@@ -330,6 +426,7 @@ def pull(
     fields: Optional[str],
     fields1: Optional[str],
     fuzzy_query: Optional[str],
+    top_k: int,
     url: str,
     table: str,
     token: str,
@@ -348,10 +445,7 @@ def pull(
         as_dict=True,
     )
     if fuzzy_query is not None:
-        fuzz = fuzz_process.extractBests(fuzzy_query, data, score_cutoff=50)
-        data = []
-        for rsl in fuzz:
-            data.append(rsl[0])
+        data = __fuzzy_filter(data, fuzzy_query, top_k)
     __write_output(
         output_file,
         file_format,
@@ -385,14 +479,12 @@ def purge(
     )
     if user != table:
         sys.exit(0)
-    records = client.list()
-    with click.progressbar(
+    records = client.list(fields="id", as_dict=True)
+    __for_each_concurrently(
         records,
+        lambda record: client.delete(record["id"]),
         label="Purge records...",
-        show_pos=True,
-    ) as bar:
-        for record in bar:
-            client.delete(record["id"])
+    )
 
 
 @click.command("sum")
@@ -427,12 +519,9 @@ def sum_command(
         sort=sort,
         as_dict=True,
     )
-    rsl = 0
-    for record in data:
-        value = record[field]
-        if value is not None:
-            rsl += value
-    print(rsl)
+    print(sum(
+        value for record in data if (value := record[field]) is not None
+    ))
 
 
 @click.command()
@@ -450,9 +539,8 @@ def template(
 ):
     """Generate a empty template for a specified table."""
     client = __get_client(config_file, url, table, token)
-    data = client.list()[0]
-    for key in data:
-        data[key] = None
+    sample = client.list(limit=1, as_dict=True)[0]
+    data = dict.fromkeys(sample)
     __write_output(output_file, file_format, [data], only_header=True)
 
 
@@ -505,13 +593,12 @@ def update_field(
         )
         if user == "Y":
             value = None
-    with click.progressbar(
+    __for_each_concurrently(
         records,
+        lambda record: client.update(record["id"], {field: value}),
         label=f"update field {field}",
-        show_pos=True,
-    ) as bar:
-        for record in bar:
-            client.update(record["id"], {field: value})
+        max_workers=16,
+    )
 
 
 cli.add_command(aggregate)
@@ -63,6 +63,17 @@ def fuzzy_query(func):
     return func
 
 
+def top_k(func):
+    func = click.option(
+        "--top-k",
+        type=click.IntRange(min=1),
+        default=5,
+        show_default=True,
+        help="only keep the best K matches of the fuzzy query",
+    )(func)
+    return func
+
+
 def input(func):
     func = click.option(
         "-i",
@@ -78,6 +89,17 @@ def input(func):
     return func
 
 
+def batch_size(func):
+    func = click.option(
+        "--batch-size",
+        type=click.IntRange(min=1),
+        default=1000,
+        show_default=True,
+        help="number of records uploaded per request",
+    )(func)
+    return func
+
+
 def output(func):
     func = click.option(
         "-o",
@@ -2,37 +2,48 @@
 Everything related to file in- and output.
 """
 
-from openpyxl import Workbook
-from openpyxl.formatting.rule import FormulaRule
-from openpyxl.utils.cell import get_column_letter
-from openpyxl.styles import (
-    Alignment,
-    Border,
-    Font,
-    NamedStyle,
-    PatternFill,
-    Side,
-)
-from openpyxl.styles.differential import DifferentialStyle
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.worksheet.datavalidation import DataValidation
-from openpyxl.worksheet.table import Table
-
-from abc import (
-    ABC,
-    abstractmethod,
-    abstractclassmethod,
-    abstractstaticmethod,
-)
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
 import csv
+from datetime import date
+import functools
+import importlib
 import io
 import json
 import logging
 import math
 from pathlib import Path
 import sys
-from typing import Any, Dict, List, Optional
-import yaml
+from types import ModuleType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+
+if TYPE_CHECKING:
+    from xlsxwriter.format import Format
+    from xlsxwriter.workbook import Workbook
+    from xlsxwriter.worksheet import Worksheet
+
+
+@functools.lru_cache(maxsize=None)
+def _import(name: str) -> Optional[ModuleType]:
+    """
+    Imports an optional dependency on first use, returns None if it isn't
+    installed.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
 
 
 class StdInNotSupported(Exception):
@@ -117,13 +128,24 @@ class File(ABC):
     """Optional path to input file."""
     level_nested: bool
     """Level out nested structures."""
+    output_buffer_size: int = 1 << 20
+    """Buffer size in bytes used when writing to an output file."""
+    text_output: bool = True
+    """
+    The output is text, a newline is added when it's written to stdout.
+    """
 
     def __init__(
         self,
         input_path: Optional[Path],
         output_path: Optional[Path],
         level_nested: bool,
+        **kwargs,
     ):
+        """
+        Options specific to a format (like `only_header` for CSV) are passed
+        as keyword arguments and ignored by the other implementations.
+        """
         self.input_path = input_path
         self.output_path = output_path
         self.level_nested = level_nested
@@ -133,33 +155,65 @@ class File(ABC):
         if self.input_path is None:
             if not self.supports_std():
                 raise StdInNotSupported(self)
-            return self.parse(io.BytesIO(self.__read_stdin()))
+            return self.parse(self.__stdin())
 
         with open(self.input_path, "rb") as file:
             return self.parse(file)
 
+    def load_iter(self) -> Iterator[Dict[str, Any]]:
+        """
+        Load the records in the file one by one. Implementations which can
+        parse their input incrementally (see `parse_stream`) don't have to
+        hold the whole file in memory.
+        """
+        if self.input_path is None:
+            if not self.supports_std():
+                raise StdInNotSupported(self)
+            yield from self.parse_stream(self.__stdin())
+            return
+
+        with open(self.input_path, "rb") as file:
+            yield from self.parse_stream(file)
+
+    @staticmethod
+    def __stdin() -> io.BufferedIOBase:
+        """
+        Returns stdin as a binary stream. Piped input is handed over as is,
+        input typed into a terminal is read first so it can be ended with
+        Ctrl-C (as well as Ctrl-D).
+        """
+        if not sys.stdin.isatty():
+            return sys.stdin.buffer
+        lines: List[bytes] = []
+        try:
+            for line in sys.stdin.buffer:
+                lines.append(line)
+        except KeyboardInterrupt:
+            sys.stdout.flush()
+        return io.BytesIO(b"".join(lines))
+
     def save(self, data: Dict[str, Any]):
         """Saves/outputs the data to the file/stdout."""
         data = self.__level(data)
         if self.output_path is None:
             if not self.supports_std():
                 raise StdOutNotSupported(self)
-            print(self.dump(data).decode("utf-8"))
-        else:
-            with open(self.output_path, "wb") as file:
-                file.write(self.dump(data))
-
-    @staticmethod
-    def __read_stdin() -> str:
-        rsl = ""
-        try:
-            for line in sys.stdin:
-                rsl += line
-        except KeyboardInterrupt:
+            # Anything already printed has to go out before the raw bytes.
             sys.stdout.flush()
-        return rsl
+            self.dump_to(data, sys.stdout.buffer)
+            if self.text_output:
+                sys.stdout.buffer.write(b"\n")
+            sys.stdout.buffer.flush()
+        else:
+            with open(
+                self.output_path,
+                "wb",
+                buffering=self.output_buffer_size,
+            ) as file:
+                self.dump_to(data, file)
 
-    @abstractclassmethod
+    @classmethod
+    @abstractmethod
     def format_name(cls) -> str:
         """
         Returns the name of the format supported by the given implementation of
@@ -168,7 +222,8 @@ class File(ABC):
         """
         pass
 
-    @abstractclassmethod
+    @classmethod
+    @abstractmethod
     def file_extensions(cls) -> List[str]:
         """
         Returns a list of the valid file extensions for this file type with a
@@ -176,7 +231,8 @@ class File(ABC):
         """
         pass
 
-    @abstractclassmethod
+    @classmethod
+    @abstractmethod
     def supports_std(self) -> bool:
         """
         States whether the data type can be in-/outputted to/from the
@@ -186,7 +242,8 @@ class File(ABC):
         """
         pass
 
-    @abstractstaticmethod
+    @staticmethod
+    @abstractmethod
     def parse(raw: io.BufferedReader) -> Dict[str, Any]:
         """
         Parses a given file (opened in binary mode) and returns it's structure
@@ -194,6 +251,22 @@ class File(ABC):
         """
         pass
 
+    @classmethod
+    def parse_stream(
+        cls,
+        raw: io.BufferedReader,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Parses a given file (opened in binary mode) and yields it's records.
+        The default implementation parses the whole file using `parse`, a file
+        containing a single record yields only this record.
+        """
+        data = cls.parse(raw)
+        if isinstance(data, dict):
+            yield data
+        else:
+            yield from data
+
     @abstractmethod
     def dump(self, data: Dict[str, Any]) -> bytes:
         """
@@ -201,31 +274,36 @@ class File(ABC):
         """
         pass
 
+    def dump_to(self, data: Dict[str, Any], stream: io.BufferedIOBase):
+        """
+        Writes the dumped data structure to the given binary stream.
+        Implementations which can write their output incrementally override
+        this to avoid building the whole output in memory first.
+        """
+        stream.write(self.dump(data))
+
     def __level(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         if not self.level_nested:
             return data
-        for entry in data:
-            rsl = {}
-            for field in entry:
-                if not isinstance(entry[field], dict):
-                    continue
-                sub_rsl = {}
-                for sub_field in entry[field]:
-                    sub_rsl[f"{field}_{sub_field}"] = entry[field][sub_field]
-                rsl[field] = sub_rsl
-            for r in rsl:
-                del entry[r]
-                entry.update(rsl[r])
+        return [dict(self.__level_entry(entry)) for entry in data]
 
-        return data
+    @staticmethod
+    def __level_entry(entry: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        """
+        Yields the fields of an entry, the fields of a nested dict are yielded
+        in it's place prefixed by the name of the parent field.
+        """
+        for field, value in entry.items():
+            if isinstance(value, dict):
+                for sub_field, sub_value in value.items():
+                    yield f"{field}_{sub_field}", sub_value
+            else:
+                yield field, value
 
 
 class Json(File):
     """JSON implementation for `File`."""
 
-    def __init__(self, *args):
-        super().__init__(*args)
-
     @classmethod
     def format_name(cls) -> str:
         return "json"
@@ -240,18 +318,50 @@ class Json(File):
 
     @staticmethod
     def parse(raw: io.BufferedReader) -> Dict[str, Any]:
-        return json.load(raw)
+        orjson = _import("orjson")
+        if orjson is None:
+            return json.load(raw)
+        return orjson.loads(raw.read())
+
+    @classmethod
+    def parse_stream(
+        cls,
+        raw: io.BufferedReader,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the items of a top level array one by one using ijson if it's
+        installed. Everything else is parsed as a whole.
+        """
+        ijson = _import("ijson")
+        if ijson is None or not cls.__is_array(raw):
+            yield from super().parse_stream(raw)
+            return
+        yield from ijson.items(raw, "item", use_float=True)
 
     def dump(self, data: Dict[str, Any]) -> bytes:
-        return json.dumps(data).encode("utf-8")
+        orjson = _import("orjson")
+        if orjson is None:
+            return json.dumps(data).encode("utf-8")
+        return orjson.dumps(data)
+
+    @staticmethod
+    def __is_array(raw: io.BufferedReader) -> bool:
+        """
+        Peeks whether the document's top level value is an array. Streams
+        which can't be rewound are reported as not being an array.
+        """
+        if not raw.seekable():
+            return False
+        start = raw.tell()
+        while (char := raw.read(1)).isspace():
+            pass
+        raw.seek(start)
+        return char == b"["
 
 
 class Yaml(File):
     """YAML implementation for `File`."""
 
-    def __init__(self, *args):
-        super().__init__(*args)
-
     @classmethod
     def format_name(cls) -> str:
         return "yaml"
@@ -266,10 +376,18 @@ class Yaml(File):
 
     @staticmethod
     def parse(raw: io.BufferedReader) -> Dict[str, Any]:
-        return yaml.load(raw, Loader=yaml.FullLoader)
+        import yaml
+
+        # The C implementations are missing if PyYAML was built without
+        # libyaml.
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        return yaml.load(raw, Loader=loader)
 
     def dump(self, data: Dict[str, Any]) -> bytes:
-        return yaml.dump(data).encode("utf-8")
+        import yaml
+
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        return yaml.dump(data, Dumper=dumper).encode("utf-8")
 
 
 class Csv(File):
@@ -300,27 +418,79 @@ class Csv(File):
 
     @staticmethod
     def parse(raw: io.BufferedReader) -> Dict[str, Any]:
-        data = csv.DictReader(io.StringIO(raw.read().decode("utf-8")))
-        rsl = []
-        for entry in data:
-            for field in entry:
-                if entry[field] == "":
-                    entry[field] = None
-            rsl.append(entry)
-        return rsl
+        return list(Csv.parse_stream(raw))
+
+    @classmethod
+    def parse_stream(
+        cls,
+        raw: io.BufferedReader,
+    ) -> Iterator[Dict[str, Any]]:
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        try:
+            reader = csv.reader(text)
+            header = next(reader, [])
+            for row in reader:
+                if not row:
+                    # Skip blank lines like csv.DictReader does.
+                    continue
+                if len(row) > len(header):
+                    # csv.DictReader kept these under the None key, dropping
+                    # them would silently lose data.
+                    raise ValueError(
+                        f"line {reader.line_num} has {len(row)} fields but "
+                        f"the header only {len(header)}"
+                    )
+                if len(row) < len(header):
+                    row += [""] * (len(header) - len(row))
+                yield {
+                    field: (value or None)
+                    for field, value in zip(header, row)
+                }
+        finally:
+            # Closing the wrapper would also close the underlying file.
+            text.detach()
 
     def dump(self, data: List[Dict[str, Any]]) -> bytes:
-        buffer = io.StringIO()
-        writer = csv.DictWriter(
-            buffer,
-            fieldnames=data[0].keys(),
-            quotechar='"',
-        )
-        writer.writeheader()
+        buffer = io.BytesIO()
+        self.dump_to(data, buffer)
+        return buffer.getvalue()
+
+    def dump_to(self, data: List[Dict[str, Any]], stream: io.BufferedIOBase):
+        text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        try:
+            self.__write_rows(data, text)
+        finally:
+            text.flush()
+            # Closing the wrapper would also close the underlying stream.
+            text.detach()
+
+    def __write_rows(self, data: List[Dict[str, Any]], text: io.TextIOBase):
+        fields = list(data[0].keys())
+        writer = csv.writer(text, quotechar='"')
+        writer.writerow(fields)
         if not self.only_header:
-            for entry in data:
-                writer.writerow(entry)
-        return buffer.getvalue().encode("utf-8")
+            known = set(fields)
+            writer.writerows(
+                self.__row(entry, fields, known) for entry in data
+            )
+
+    @staticmethod
+    def __row(
+        entry: Dict[str, Any],
+        fields: List[str],
+        known: Set[str],
+    ) -> List[Any]:
+        """
+        Returns the values of the entry in the order of the header fields.
+        Missing fields result in an empty cell and fields which aren't part
+        of the header raise a ValueError, both like csv.DictWriter does.
+        """
+        if not entry.keys() <= known:
+            raise ValueError(
+                "dict contains fields not in fieldnames: "
+                + ", ".join(repr(key) for key in entry.keys() - known)
+            )
+        return [entry.get(field) for field in fields]
 
 
 class Xlsx(File):
@@ -330,27 +500,21 @@ class Xlsx(File):
 
     freeze_at: Optional[str] = None
     """Defines the cell where the table should be freezed at."""
-    header_color = "00C0C0C0"
+    header_color = "#C0C0C0"
     """Defines the background color of the header row."""
-    header_font: Font = Font(
-        name="Calibri",
-        bold=True,
-    )
-    font: Font = Font(
-        name="Calibri",
-        size=10,
-    )
-    """Font format for the header row."""
-    side: Side = Side(border_style="thin", color="000000")
+    header_font: Dict[str, Any] = {"font_name": "Calibri", "bold": True}
+    """Font attributes of the header row."""
+    font: Dict[str, Any] = {"font_name": "Calibri", "font_size": 10}
+    """Font attributes of the content rows."""
+    border: Dict[str, Any] = {"border": 1, "border_color": "#000000"}
     """Line style of the cells."""
-    alternating_row_color: str = "00D3D3D3"
+    alternating_row_color: str = "#D3D3D3"
     """Background of the alternating rows."""
-
-    __longest_entry_temp: Optional[Dict[str, Any]] = None
-
+    text_output = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args)
+        self.__longest_entry_temp: Optional[Dict[str, Any]] = None
         if "freeze_at" in kwargs:
             self.freeze_at = kwargs["freeze_at"]
 
@@ -371,115 +535,142 @@ class Xlsx(File):
         raise NotImplementedError()
 
     def dump(self, data: List[Dict[str, Any]]) -> bytes:
-        wb = Workbook()
-        ws = wb.active
-        self.__worksheet_insert_header(ws, data)
-        self.__worksheet_insert_content(ws, data)
-        self.__freeze_cells(ws)
-        self.__apply_apperance(wb, ws, data)
-        self.__apply_conditional(ws, data)
-        self.__apply_data_table(ws, data)
-
         buffer = io.BytesIO()
-        wb.save(buffer)
+        self.dump_to(data, buffer)
         return buffer.getvalue()
 
-    def __worksheet_insert_header(
-        self,
-        ws: Worksheet,
-        data: List[Dict[str, Any]],
-    ) -> None:
-        """Sets and formats the header of the Worksheet."""
-        header_row = ws.row_dimensions[1]
-        ws.append([name for name in self.__longest_data_entry(data)])
+    def dump_to(self, data: List[Dict[str, Any]], stream: io.BufferedIOBase):
+        # xlsxwriter is by far the heaviest import of the formats.
+        import xlsxwriter
+
+        # The longest entry is only cached for a single dump.
+        self.__longest_entry_temp = None
+        # The constant_memory mode of xlsxwriter would discard the rows once
+        # written but doesn't support tables.
+        wb = xlsxwriter.Workbook(stream, {
+            "strings_to_urls": False,
+            "nan_inf_to_errors": True,
+        })
+        ws = wb.add_worksheet()
+        header_format, default_format, date_format = self.__formats(wb)
+        self.__freeze_cells(ws)
+        self.__apply_column_widths(wb, ws, data)
+        self.__worksheet_insert_rows(
+            ws,
+            data,
+            default_format,
+            date_format,
+        )
+        self.__apply_conditional(wb, ws, data)
+        self.__apply_data_table(ws, data, header_format)
+        wb.close()
 
-    def __worksheet_insert_content(
+    def __worksheet_insert_rows(
         self,
         ws: Worksheet,
         data: List[Dict[str, Any]],
+        default_format: Format,
+        date_format: Format,
     ) -> None:
-        """Inserts the actual data into the Worksheet."""
-        for row in data:
-            ws.append([str(cell) for cell in row.values()])
+        """
+        Inserts the actual data into the Worksheet. The header row is written
+        by the data table.
+        """
+        # The values are looked up by the header keys so records with
+        # missing or differently ordered fields stay aligned.
+        keys = list(self.__longest_data_entry(data))
+        for row, entry in enumerate(data, 1):
+            for column, key in enumerate(keys):
+                value = entry.get(key)
+                # Numbers, booleans and dates are written as such so they can
+                # be sorted and filtered in Excel. None results in an empty
+                # cell. Nested structures are left when level_nested isn't
+                # set.
+                if isinstance(value, (dict, list)):
+                    value = json.dumps(value, ensure_ascii=False)
+                elif isinstance(value, date):
+                    ws.write_datetime(row, column, value, date_format)
+                    continue
+                ws.write(row, column, value, default_format)
 
     def __freeze_cells(self, ws: Worksheet) -> None:
         """Freezes the cell at the given cell from the config."""
         if self.freeze_at is not None:
-            ws.freeze_panes = ws[self.freeze_at]
+            ws.freeze_panes(self.freeze_at)
 
-    def __apply_apperance(
+    def __formats(self, wb: Workbook) -> Tuple[Format, Format, Format]:
+        """
+        Returns the formats for the header, the content and the date cells.
+        """
+        header_format = wb.add_format({
+            **self.header_font,
+            **self.border,
+            "bg_color": self.header_color,
+            "valign": "vcenter",
+        })
+        default_properties = {
+            **self.font,
+            **self.border,
+            "valign": "vcenter",
+        }
+        default_format = wb.add_format(default_properties)
+        date_format = wb.add_format({
+            **default_properties,
+            "num_format": "yyyy-mm-dd",
+        })
+        return header_format, default_format, date_format
+
+    def __apply_column_widths(
         self,
         wb: Workbook,
         ws: Worksheet,
         data: List[Dict[str, Any]],
     ) -> None:
-        border = Border(
-            left=self.side,
-            right=self.side,
-            top=self.side,
-            bottom=self.side,
-            vertical=self.side,
-            horizontal=self.side,
-        )
-        header_style = NamedStyle(name="Header")
-        header_style.alignment = Alignment(vertical="center")
-        header_style.border = border
-        header_style.fill = PatternFill("solid", fgColor=self.header_color)
-        header_style.font = self.header_font
-
-        default_style = NamedStyle(name="Default")
-        default_style.alignment = Alignment(vertical="center")
-        default_style.border = border
-        default_style.font = self.font
-
+        wrap_format = wb.add_format({
+            "valign": "vcenter",
+            "text_wrap": True,
+            "shrink": True,
+        })
         widths = self.__calc_column_widths(data)
-        for col in range(1, ws.max_column+1):
-            column_letter = get_column_letter(col)
-            column = ws.column_dimensions[column_letter]
-            column.width = widths[col-1]
-            if widths[col-1] == 80:
-                column.alignment = Alignment(
-                    vertical="center",
-                    wrap_text=True,
-                    shrink_to_fit=True,
-                )
-            for row in range(1, len(data)+1):
-                if row == 1:
-                    style = header_style
-                else:
-                    style = default_style
-                ws[f"{column_letter}{row}"].style = style
+        for column, width in enumerate(widths):
+            if width == 80:
+                ws.set_column(column, column, width, wrap_format)
+            else:
+                ws.set_column(column, column, width)
 
     def __apply_conditional(
         self,
+        wb: Workbook,
         ws: Worksheet,
         data: List[Dict[str, Any]],
     ) -> None:
-        alternating_fill = fill=PatternFill(
-            "solid",
-            bgColor=self.alternating_row_color,
-        )
-        alternating_style = DifferentialStyle(fill=alternating_fill)
-        alternating_rule = FormulaRule(
-            fill=alternating_fill,
-            formula=["ISODD(ROW())"],
-        )
-        ws.conditional_formatting.add(
-            f"A2:{self.__max_cell(data)}",
-            alternating_rule,
-        )
+        alternating_format = wb.add_format({
+            "bg_color": self.alternating_row_color,
+        })
+        ws.conditional_format(1, 0, *self.__max_cell(data), {
+            "type": "formula",
+            "criteria": "=ISODD(ROW())",
+            "format": alternating_format,
+        })
 
     def __apply_data_table(
         self,
         ws: Worksheet,
         data: List[Dict[str, Any]],
+        header_format: Format,
     ) -> None:
-        """Configures the data table."""
-        table = Table(
-            displayName="Table",
-            ref=self.__dimensions(data)
-        )
-        ws.add_table(table)
+        """Configures the data table and writes the header row."""
+        ws.add_table(0, 0, *self.__max_cell(data), {
+            "name": "Table",
+            # openpyxl's table had no table style, the alternating rows come
+            # from the conditional formatting.
+            "style": None,
+            "banded_rows": False,
+            "columns": [
+                {"header": str(name), "header_format": header_format}
+                for name in self.__longest_data_entry(data)
+            ],
+        })
 
     def __longest_data_entry(
         self,
@@ -487,56 +678,45 @@ class Xlsx(File):
     ) -> Dict[str, Any]:
         if self.__longest_entry_temp is not None:
             return self.__longest_entry_temp
-        longest = 0
-        for i in range(0, len(data)):
-            if len(data[i]) > len(data[longest]):
-                longest = i
-        self.__longest_entry_temp = data[longest]
-        return data[longest]
+        self.__longest_entry_temp = max(data, key=len)
+        return self.__longest_entry_temp
 
     def __calc_column_widths(
         self,
         data: List[Dict[str, Any]],
-    ) -> None:
+    ) -> List[int]:
         """Calculates an approximative width for each column."""
-        keys = [key for key in self.__longest_data_entry(data)]
-
-        widths_per_key: Dict[str, int] = {}
-        for key in keys:
-            widths_per_key[key] = 0
-
-        header_data = data[0]
-        for key in keys:
-            header_data[key] = key
-        data.append(header_data)
-
+        widths_per_key = {
+            key: len(key) for key in self.__longest_data_entry(data)
+        }
         for entry in data:
-            entry_dict = entry
-            for key in keys:
-                if key not in entry_dict or not isinstance(entry_dict[key], str):
+            for key, value in entry.items():
+                if type(value) is not str or key not in widths_per_key:
                     continue
-                if (length := len(entry_dict[key])) > widths_per_key[key]:
+                if (length := len(value)) > widths_per_key[key]:
                     widths_per_key[key] = length
-        rsl: List[int] = []
-        for value in widths_per_key.values():
-            width = math.ceil(value*0.93)
-            if width > 80:
-                rsl.append(80)
-            elif width > 5:
-                rsl.append(width)
-            else:
-                rsl.append(5)
-        return rsl
+        return [
+            min(80, max(5, math.ceil(width*0.93)))
+            for width in widths_per_key.values()
+        ]
+
+    def __max_cell(self, data: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Returns the (zero based) row and column of the most outer cell."""
+        return len(data), len(self.__longest_data_entry(data)) - 1
 
-    def __max_cell(self, data: List[Dict[str, Any]]) -> None:
-        """Returns the coordinate of the most outer cell."""
-        column = get_column_letter(len(self.__longest_data_entry(data)))
-        row = len(data)
-        return f"{column}{row}"
 
-    def __dimensions(self, data: List[Dict[str, Any]]) -> None:
-        """Returns the dimension of the used space."""
-        return f"A1:{self.__max_cell(data)}"
+_BY_NAME: Dict[str, Type[File]] = {
+    file_type.format_name(): file_type
+    for file_type in (Json, Yaml, Csv, Xlsx)
+}
+"""Maps the format names to their `File` implementation."""
+
+_BY_EXTENSION: Dict[str, Type[File]] = {
+    extension: file_type
+    for file_type in (Json, Yaml, Csv, Xlsx)
+    for extension in file_type.file_extensions()
+}
+"""Maps the (lower case) file extensions to their `File` implementation."""
 
 
 def file(
@@ -552,23 +732,23 @@ def file(
     Returns the appropriate `File` implementation based on the given
     format_option.
     """
-    if format_option is None and input_path is None and output_path is None:
+    if format_option is not None:
+        file_type = _BY_NAME.get(format_option.lower())
+        if file_type is None:
+            raise FormatUnknown(format_option)
+    elif input_path is None and output_path is None:
         logging.debug("no format specified fall back to default YAML")
-        return Yaml(input_path, output_path, level_nested)
+        file_type = Yaml
+    else:
+        file_type = _by_extension(input_path, output_path)
+    return file_type(input_path, output_path, level_nested, **kwargs)
 
-    if format_option is not None:
-        format_option = format_option.lower()
-    if format_option == Json.format_name():
-        return Json(input_path, output_path, level_nested)
-    elif format_option == Yaml.format_name():
-        return Yaml(input_path, output_path, level_nested)
-    elif format_option == Csv.format_name():
-        return Csv(input_path, output_path, level_nested)
-    elif format_option == Xlsx.format_name():
-        return Xlsx(input_path, output_path, level_nested, **kwargs)
-    elif format_option is not None:
-        raise FormatUnknown(format_option)
 
+def _by_extension(
+    input_path: Optional[Path],
+    output_path: Optional[Path],
+) -> Type[File]:
+    """Determines the `File` implementation by the extension of the path(s)."""
     if input_path is not None and output_path is not None and \
             input_path.suffix.lower() != output_path.suffix.lower():
         raise DifferentInOutFormats()
@@ -577,18 +757,10 @@ def file(
         path = input_path
     else:
         path = output_path
-    suffix = path.suffix.lower()
-
-    if suffix in Json.file_extensions():
-        logging.debug("type assessed as JSON by file extension")
-        return Json(input_path, output_path, level_nested)
-    elif suffix in Yaml.file_extensions():
-        logging.debug("type assessed as YAML by file extension")
-        return Yaml(input_path, output_path, level_nested)
-    elif suffix in Csv.file_extensions():
-        logging.debug("type assessed as CSV by file extension")
-        return Csv(input_path, output_path, level_nested)
-    elif suffix in Xlsx.file_extensions():
-        logging.debug("type assessed as XLSX by file extension")
-        return Xlsx(input_path, output_path, level_nested, **kwargs)
-    raise FormatNotAscertainable(path)
+    file_type = _BY_EXTENSION.get(path.suffix.lower())
+    if file_type is None:
+        raise FormatNotAscertainable(path)
+    logging.debug(
+        f"type assessed as {file_type.format_name().upper()} by file extension"
+    )
+    return file_type
@@ -29,9 +29,12 @@ setuptools.setup(
         "click==8.0.1",
         "jinja2==3.0.3",
         "pyyaml==5.4.1",
-        "python-Levenshtein==0.12.1",
         "nocopy==0.1.5",
-        "openpyxl==3.0.9",
-        "thefuzz==0.19.0",
-    ]
+        "xlsxwriter==3.0.2",
+        "orjson==3.6.5",
+        "rapidfuzz==2.0.11",
+    ],
+    extras_require={
+        "stream": ["ijson==3.1.4"],
+    },
 )